@@ -1,11 +1,77 @@
 import json
+import numpy as np
 import os
 from PIL import Image
 import pygame as pg
-import random
-
-pg.init()
-pg.display.set_caption("Sliding Puzzle")
+import time
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# How the empty space moves for each input, which is the opposite direction to the block sliding into it
+MOVE_DELTAS = {
+    pg.K_UP: (0, 1),
+    pg.K_DOWN: (0, -1),
+    pg.K_RIGHT: (-1, 0),
+    pg.K_LEFT: (1, 0)
+}
+
+MOVE_LETTERS = {
+    pg.K_UP: 'U',
+    pg.K_DOWN: 'D',
+    pg.K_RIGHT: 'R',
+    pg.K_LEFT: 'L'
+}
+
+LETTER_MOVES = {letter: move for move, letter in MOVE_LETTERS.items()}
+MOVE_CODES = {move: ord(letter) for move, letter in MOVE_LETTERS.items()}
+WALK_DELTAS = tuple(MOVE_DELTAS.values())
+
+# The only events let onto the queue, peek is always given these since without any types it returns an event instead of a bool
+HANDLED_EVENTS = (pg.QUIT, pg.KEYDOWN, pg.WINDOWEXPOSED)
+
+def walk_empty_space(board, width, index, directions):
+    """
+    Moves the empty space at the given index in each of the given directions, which index WALK_DELTAS, skipping any that would go off the board.
+    The board is a flat array of rows of the given width, it's changed in place and the new index of the empty space is returned.
+    The walk is done on a plain list copy of the board, since indexing lists is quicker than indexing arrays in Python.
+    """
+
+    height = len(board) // width
+    values = board.tolist()
+
+    # The index of the neighbour of each cell in every direction, or None where it would be off the board
+    neighbors = [
+        [(y+dy)*width + x+dx if 0 <= x+dx < width and 0 <= y+dy < height else None for dx, dy in WALK_DELTAS]
+        for y in range(height) for x in range(width)
+    ]
+
+    for direction in directions.tolist():
+        neighbor = neighbors[index][direction]
+        if neighbor is not None:
+            values[index], values[neighbor] = values[neighbor], values[index]
+            index = neighbor
+
+    board[:] = values
+    return index
+
+if njit is not None:
+    # With numba installed, the walk is compiled so it runs on the array directly
+    @njit(cache=True)
+    def walk_empty_space(board, width, index, directions):
+        height = len(board) // width
+        x, y = index % width, index // width
+
+        for direction in directions:
+            dx, dy = WALK_DELTAS[direction]
+            nx, ny = x+dx, y+dy
+            if 0 <= nx < width and 0 <= ny < height:
+                board[y*width + x], board[ny*width + nx] = board[ny*width + nx], board[y*width + x]
+                x, y = nx, ny
+
+        return y*width + x
 
 def load_previous_state():
     """Will load the game state from the previous solve, including the scrambled board state and moves made."""
@@ -23,40 +89,46 @@ def save_current_state(state):
     
     path = 'previous_state.json'
     with open(path, 'w') as f:
-        json.dump(state, f, indent=4)
-    
-def crop(img, tiles_per_side):
-    """Returns a list of cropped square tile images."""
+        json.dump(state, f, separators=(',', ':'))
     
-    img_num = 0
-    width, height = img.size
-    cutsize = width // tiles_per_side
-    tiles = []
-    
-    # Perform square tile cuts
-    for i in range(height//cutsize):
-        for j in range(width//cutsize):
-            box = (j*cutsize, i*cutsize, (j+1)*cutsize, (i+1)*cutsize)
-            tile = img.crop(box)
-            tiles.append(tile)
-    return tiles
+def pilImageToSurface(pilImage):
+    """
+    Returns the image as an opaque surface in the display's pixel format, since tile images never need transparency.
+    Without an alpha channel, SDL copies the image straight across when it's blitted instead of blending every pixel.
+    """
 
-def copy_board(board):
-    return [[val for val in row] for row in board]
+    # Images which aren't RGB already, such as RGBA or palette images, have their alpha dropped here
+    if pilImage.mode != 'RGB':
+        pilImage = pilImage.convert('RGB')
 
-def pilImageToSurface(pilImage):
-    return pg.image.fromstring(
+    # frombuffer wraps the image bytes instead of copying them, convert() then makes the only copy in the display's pixel format
+    return pg.image.frombuffer(
         pilImage.tobytes(), pilImage.size, pilImage.mode).convert()
 
 class Application:
     def __init__(self, grid, sidebar):
         self.running = True
-        self.clock = pg.time.Clock()
         self.fps = 60
+        self.last_tick = time.perf_counter()
+        self.next_frame = self.last_tick
+        self.idle_wait = 100 # Milliseconds to wait for input between loops while the window is minimised
+        self.full_update = False # Updates the whole window next frame, rather than only the parts that changed
 
         self.grid = grid # Height is measures in number of tiles
         self.sidebar = sidebar # Height is measured in actual pixels
 
+        # Grid colours are made once here instead of every frame, the grid cycles through the rainbow once the puzzle is solved
+        self.theme_color = pg.Color(grid.theme['grid_color'])
+        self.playback_color = pg.Color(128, 0, 0)
+        self.rainbow = [pg.Color(0) for _ in range(256)]
+        for i, color in enumerate(self.rainbow):
+            color.hsva = (i * 360 / len(self.rainbow), 100, 100, 100)
+        self.frame = 0
+
+        # Only the events handled in event_loop are let onto the queue, the rest are dropped by SDL
+        pg.event.set_blocked(None)
+        pg.event.set_allowed(HANDLED_EVENTS)
+
     def reset(self):
         self.grid.reset()
         self.sidebar.reset()
@@ -66,20 +138,29 @@ class Application:
         self.sidebar.reset()
         
     def event_loop(self):
+        # The queue only ever holds the allowed events, so it's emptied in one call without filtering it by type
         for event in pg.event.get():
             if event.type == pg.QUIT:
                 self.quit()
 
-            if event.type == pg.KEYDOWN:
-                if not self.grid.has_won:
-                    self.grid.make_move(event.key)
+            # Parts of the window were covered up, so what was drawn there needs updating again
+            elif event.type == pg.WINDOWEXPOSED:
+                self.full_update = True
+
+            elif event.type == pg.KEYDOWN:
+                key = event.key
 
-                if event.key == pg.K_r:
+                # Only the arrow keys move blocks, any other key goes straight to the checks below
+                if key in MOVE_DELTAS:
+                    if not self.grid.has_won:
+                        self.grid.make_move(key)
+
+                elif key == pg.K_r:
                     self.reset()
                     self.grid.play_sfx('restart')
 
                 # Replay of the last game
-                if event.key == pg.K_p:
+                elif key == pg.K_p:
                     self.grid.toggle_playback_mode()
 
                     if self.grid.playback_mode:
@@ -93,11 +174,9 @@ class Application:
                         
                     
     def update(self, dt):
-        self.grid.display()
-        self.sidebar.display(dt)
-
+        # Changes to the grid are made before drawing, so that the areas they mark as changed are drawn this frame
         if self.grid.playback_mode:
-            self.grid.grid_color = [128, 0, 0]
+            self.grid.set_grid_color(self.playback_color)
             if len(self.moves_to_preview) > 0:
                 move = self.moves_to_preview.pop(0)
                 self.grid.make_move(move)
@@ -105,23 +184,85 @@ class Application:
                 self.grid.toggle_playback_mode()
 
         elif self.grid.has_won:
-            color = [random.randint(0, 255) for _ in range(3)]
-            self.grid.grid_color = color
+            self.frame = (self.frame + 1) % len(self.rainbow)
+            self.grid.set_grid_color(self.rainbow[self.frame])
         else:
-            self.grid.grid_color = self.grid.theme['grid_color']
+            self.grid.set_grid_color(self.theme_color)
+
+        self.grid.display()
+        self.sidebar.display(dt)
             
 
     def run(self):
-        dt = self.clock.tick(self.fps)
-        self.update(dt)
-        
+        # The frame clock starts now, so loading the grid before the game started isn't counted as time played
+        self.last_tick = time.perf_counter()
+        self.next_frame = self.last_tick
+
+        # The first frame is drawn and shown by the loop itself
         while self.running:
-            dt = self.clock.tick(self.fps)
+            dt = self.tick()
             self.event_loop()
-            self.update(dt)
-            pg.display.update()
+
+            if pg.display.get_active():
+                self.update(dt)
+                self.update_display()
+            else:
+                self.idle(dt)
         pg.quit()
 
+    def idle(self, dt):
+        """
+        Nothing can be seen while the window is minimised, so no frames are drawn and only the timer is kept going.
+        Instead of looping at the full frame rate, this waits until there is input or a while has passed.
+        """
+
+        self.full_update = True # The window is updated in full once it is restored
+        self.sidebar.timer_tick(dt)
+        self.wait_for_event(self.idle_wait)
+
+    def wait_for_event(self, timeout):
+        """
+        Blocks for up to timeout milliseconds, returning as soon as there is an event to handle.
+        The event is left on the queue for event_loop, it's only taken off by waiting when the queue is empty so the order is kept.
+        """
+
+        if timeout <= 0 or pg.event.peek(HANDLED_EVENTS):
+            return
+
+        event = pg.event.wait(timeout)
+        if event.type != pg.NOEVENT:
+            pg.event.post(event)
+
+    def tick(self):
+        """
+        Waits until the next frame is due or there is input, and returns the number of milliseconds since the last tick.
+        The wait blocks on the event queue, so no CPU is used between frames and key presses are handled without waiting out the frame.
+        """
+
+        # After a long frame, the next one is timed from now instead of trying to catch up
+        self.next_frame = max(self.next_frame + 1/self.fps, time.perf_counter())
+        self.wait_for_event(int((self.next_frame - time.perf_counter()) * 1000))
+
+        # Whole milliseconds are taken from the running clock, so the rounding doesn't add up over time
+        now = time.perf_counter()
+        dt = int(now * 1000) - int(self.last_tick * 1000)
+        self.last_tick = now
+        return dt
+
+    def update_display(self):
+        """Only the parts of the screen which changed this frame are updated on the window."""
+
+        dirty_rects = self.grid.dirty_rects + self.sidebar.dirty_rects
+
+        if self.full_update:
+            pg.display.update()
+            self.full_update = False
+        elif dirty_rects:
+            pg.display.update(dirty_rects)
+
+        self.grid.dirty_rects.clear()
+        self.sidebar.dirty_rects.clear()
+
     def quit(self):
         self.running = False
 
@@ -131,8 +272,8 @@ class Grid:
         self.height = height
         self.tile_length = tile_length
         
-        self.empty_index = [width-1, height-1] # The index which starts
-        self.moves_made = ''
+        self.empty_index = width*height - 1 # The index which starts, with the board stored row by row in a flat array
+        self.moves_made = bytearray() # Letters of the moves made, stored as bytes so recording a move is a cheap append
         self.has_started = False
         self.playback_mode = False
         self.previous_state = load_previous_state() # Loads the JSON file for the previous game state for action replays
@@ -147,17 +288,75 @@ class Grid:
         self.grid_color = pg.Color(theme['grid_color'])
         self.line_color = pg.Color(theme['line_color'])
         self.font = pg.font.SysFont(theme['font_name'], 30)
-        self.sfx_mapping = self.load_sounds()
+        self.number_surfaces = self.render_numbers()
 
-        self.grid = self.initialise_grid()
-        self.scrambled_board = copy_board(self.grid)
+        # How far each number's top left corner is from its centre, so it can be centred on a tile without making a Rect
+        self.number_offsets = [
+            (text.get_width()//2, text.get_height()//2) if text is not None else None
+            for text in self.number_surfaces
+        ]
+        self.sfx_mapping = self.load_sounds()
+        self.sfx_cache = {}
+        if theme['has_sound']:
+            self.get_sfx('move') # Loaded up front, since it plays on every move
+
+        # Image chunk for each tile value, the empty tile (0) never has one
+        self.tile_imgs = [None] * (width*height)
+        if theme['has_image']:
+            self.process_image_bg(self.tile_imgs)
+
+        # The board is drawn once onto this surface, after a move only the two swapped tiles are drawn again
+        # It's opaque and covers the whole board, so only the margins around it need filling when it's all redrawn
+        self.board_surface = pg.Surface((width*tile_length, height*tile_length)).convert()
+        self.dirty = True
+        self.dirty_tiles = [] # Indexes of the tiles which changed since the board was last drawn
+
+        # Areas of the screen which need updating on the window, starting with the whole grid
+        self.area_rect = pg.Rect(0, 0, width*tile_length + margin_x*2, height*tile_length + margin_y*2)
+        self.board_rect = pg.Rect(margin_x, margin_y, width*tile_length, height*tile_length)
+        self.dirty_rects = [self.area_rect]
+
+        # The top, bottom, left and right margins around the board
+        self.margin_rects = [
+            pg.Rect(0, 0, self.area_rect.width, margin_y),
+            pg.Rect(0, self.board_rect.bottom, self.area_rect.width, margin_y),
+            pg.Rect(0, margin_y, margin_x, self.board_rect.height),
+            pg.Rect(self.board_rect.right, margin_y, margin_x, self.board_rect.height)
+        ]
+
+        # Where each tile goes on the board surface, and the area it covers on the screen, in the same order as the board
+        self.tile_rects = [
+            pg.Rect(x*tile_length, y*tile_length, tile_length, tile_length)
+            for y in range(height) for x in range(width)
+        ]
+        self.screen_tile_rects = [rect.move(margin_x, margin_y) for rect in self.tile_rects]
+        self.tile_centers = [rect.center for rect in self.tile_rects]
+
+        # The index of the block each move would slide into the empty space, for every index the empty space can be at
+        # Moves which would go off the board are left out
+        self.neighbors = [
+            {move: (y+dy)*width + x+dx for move, (dx, dy) in MOVE_DELTAS.items() if self.is_index_in_bounds(x+dx, y+dy)}
+            for y in range(height) for x in range(width)
+        ]
+
+        # Built once and never changed, since every new board starts from it and is compared against it
+        self.solved = self.get_solved_grid()
+        self.solved.flags.writeable = False
+        self.solved_values = self.solved.tolist() # Plain ints, which are quicker to compare against on each move
+        self.board = self.initialise_grid()
+        self.scrambled_board = self.board.copy()
         self.has_started = True
 
     def __repr__(self):
-        return str(self.grid)
+        return str(self.rows())
 
     def __iter__(self):
-        return iter(self.grid)
+        return iter(self.rows())
+
+    def rows(self):
+        """Returns a height x width view of the board, for when it's easier to think of in rows."""
+
+        return self.board.reshape(self.height, self.width)
 
     @property
     def has_won(self):
@@ -165,238 +364,302 @@ class Grid:
         Checks if the game is over, since all the tiles are in order
         """
         
-        return self.is_ordered_grid(self.get_tile_values(self.grid))
+        return self.misplaced == 0
 
-    def is_ordered_grid(self, grid):
-        """Returns if a given grid is ordered. This only compares grids which comprise only of integers and strings. This will not accept Tile objects."""
-        
-        return grid == self.get_new_grid()
-
-    def get_tile_values(self, grid):
-        """This ensures that the the input grid is converted into a basic matrix of integers and strings, even if the input contains Tile objects or integers."""
-        res_grid = []
-        for row in grid:
-            res_row = []
-            for tile in row:
-                if isinstance(tile, Tile):
-                    res_row.append(tile.value)
-                else:
-                    res_row.append(tile)
-            res_grid.append(res_row)
-        return res_grid
-    
-    def convert_to_tiles(self, grid):
-        return [[Tile(i) for i in j] for j in grid]
-    
     def find_bg_image(self, folder):
         """Any image file which is named 'bg' becomes the background image for the puzzle."""
         
-        for file in os.listdir(folder):
-            name, ext = os.path.splitext(file)
-            if name.lower() == 'bg':
-                return os.path.join(folder, file)
+        # scandir gives each entry's full path, so it doesn't need joining back onto the folder
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                name, ext = os.path.splitext(entry.name)
+                if name.lower() == 'bg':
+                    return entry.path
         
+    def render_numbers(self):
+        """
+        Renders the number of every tile once, so they can be blitted instead of rendered every time the board is drawn.
+        Each number is converted to the screen's pixel format, keeping the colour key which makes its background transparent.
+        The surfaces are indexed by tile value, like the board, and the empty tile (0) has no number.
+        """
+
+        number_surfaces = [self.font.render(str(i), False, self.line_color).convert() for i in range(1, self.width*self.height)]
+        return [None] + number_surfaces
+
     def load_sounds(self):
-        if self.theme['has_sound']:
-            path = os.path.join(self.theme['theme'], 'sfx')
-            sfx_mapping = {}
-            for file in os.listdir(path):
-                filename, _ = os.path.splitext(file)
-                sfx = pg.mixer.Sound(os.path.join(path, file))
-                sfx_mapping[filename] = sfx
-            return sfx_mapping
+        """
+        The mixer is only started for themes with sound, so silent themes don't run SDL's audio thread.
+        This only finds the path of each sound effect, they are loaded the first time they are played.
+        """
+
+        if not self.theme['has_sound']:
+            return {}
+
+        pg.mixer.init()
+        path = os.path.join(self.theme['theme'], 'sfx')
+        with os.scandir(path) as entries:
+            return {os.path.splitext(entry.name)[0]: entry.path for entry in entries}
+
+    def get_sfx(self, sfx):
+        """Returns the sound effect with the given name, loading it if it hasn't been played before."""
+
+        sound = self.sfx_cache.get(sfx)
+        if sound is None:
+            sound = pg.mixer.Sound(self.sfx_mapping[sfx])
+            self.sfx_cache[sfx] = sound
+        return sound
 
     def play_sfx(self, sfx):
         if self.theme['has_sound']:
-            self.sfx_mapping[sfx].play()
+            self.get_sfx(sfx).play()
             
     def reset(self):
         """For restarting a new round afresh"""
         self.shuffle()
-        self.moves_made = ''
+        self.moves_made = bytearray()
         self.playback_mode = False
+        self.redraw_board()
 
     def playback_reset(self):
         """For resetting the playback scene."""
 
-        self.empty_index = [self.width-1, self.height-1]
-        self.moves_made = ''
+        self.empty_index = self.width*self.height - 1
+        self.moves_made = bytearray()
+        self.redraw_board()
 
     def load_playback_grid(self, solve):
         """Function which loads the scrambled grid from the previous solve."""
 
-        self.grid = self.get_new_grid()
-        self.grid = self.process_grid(self.grid)
+        self.board = self.get_new_grid()
         self.reverse_solve(solve)
         
     def toggle_playback_mode(self):
         self.playback_mode = not self.playback_mode
 
     def get_image_chunks(self, path):
-        img = Image.open(path)
-        img = img.resize((self.width*self.tile_length, self.height*self.tile_length))
-        return crop(img, self.width)
+        """
+        Returns a list of square tile images, going row by row.
+        The whole image is converted to a surface once and each tile is a subsurface of it, so no pixels are copied per tile.
+        """
+
+        img = self.load_resized_image(path)
+        surface = pilImageToSurface(img)
+
+        chunks = []
+        for y in range(self.height):
+            for x in range(self.width):
+                rect = pg.Rect(x*self.tile_length, y*self.tile_length, self.tile_length, self.tile_length)
+                chunks.append(surface.subsurface(rect))
+        return chunks
+
+    def load_resized_image(self, path):
+        """
+        Returns the image at the given path resized to fit the board.
+        The resized image is saved next to the original as bg.<width>x<height>.png, so later games can skip resizing it.
+        Tiles are opaque, so any alpha channel is dropped before resizing to let SDL use its fastest blits and resize one less channel.
+        """
+
+        size = (self.width*self.tile_length, self.height*self.tile_length)
+        cache_path = os.path.join(os.path.dirname(path), 'bg.{}x{}.png'.format(*size))
+
+        # The cached image is only used if it was made after the last change to the original
+        if os.path.isfile(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(path):
+            return Image.open(cache_path).convert('RGB')
+
+        img = Image.open(path).convert('RGB').resize(size, Image.LANCZOS)
+        try:
+            img.save(cache_path)
+        except OSError:
+            pass # The cache only speeds up loading, so the game goes on without it
+        return img
+
+    def assign_image_chunks(self, tile_imgs, chunks):
+        """The chunks are in solved order, so the chunk at index i belongs to tile value i+1."""
 
-    def assign_image_chunks(self, grid, chunks):
-        for row in grid:
-            for tile in row:
-                if tile.value != '':
-                    tile.img = pilImageToSurface(chunks.pop(0))
+        for value in range(1, len(tile_imgs)):
+            tile_imgs[value] = chunks[value-1]
 
-    def process_image_bg(self, grid):
+    def process_image_bg(self, tile_imgs):
         image_path = self.find_bg_image(self.theme['theme'])
         chunks = self.get_image_chunks(image_path)
-        self.assign_image_chunks(grid, chunks)
+        self.assign_image_chunks(tile_imgs, chunks)
                     
     def get_new_grid(self):
-        """Returns a grid containing integer elements. The empty space is represented as an empty string."""
+        """Returns a copy of the solved grid, which can be shuffled or played on."""
+
+        return self.solved.copy()
+
+    def get_solved_grid(self):
+        """Returns a flat array of the tile values in solved order, going row by row. The empty space is represented as 0."""
         
-        grid = []
         w, h = self.width, self.height
-        
-        for i in range(1, w*h, w):
-            grid.append([str(j) for j in range(i, i+w)])
+        grid = np.arange(1, w*h + 1, dtype=np.int16)
             
         # Replace the last element with an empty element
-        x, y = self.empty_index
-        grid[y][x] = ''
+        grid[self.empty_index] = 0
         return grid
 
     def initialise_grid(self):
-        """Perform shuffle to the grid and convert each element to tile objects. This is used for starting a new game afresh."""
+        """Perform shuffle to the grid. This is used for starting a new game afresh."""
 
-        self.grid = self.get_new_grid()
-        self.grid = self.process_grid(self.grid)
+        self.board = self.get_new_grid()
         self.shuffle()
-        return self.grid
-
-    def process_grid(self, grid):
-        """Function which loads a grid of scrambled integers and string and returns them in converted Tile format."""
-
-        grid = self.convert_to_tiles(grid)
-        if self.theme['has_image']:
-            self.process_image_bg(grid)
-        return grid
+        return self.board
 
     def is_index_in_bounds(self, x, y):
-        return x >= 0 and x < len(self.grid[0]) and y >= 0 and y < len(self.grid)
+        return x >= 0 and x < self.width and y >= 0 and y < self.height
     
-    def make_move(self, move, shuffle=False):
+    def make_move(self, move):
         """
         These moves will move a block into the space in that direction, if possible.
         This is equivalent to moving the empty space in the opposite direction.
         Inputs will be specified using the w,a,s,d keys for now.
+        Returns True if the move solved the puzzle.
         """
         
-        x, y = self.empty_index
-
-        # Find the neighboring block from the empty space in the opposite direction
-        neighbors = {
-            pg.K_UP: (x, y+1),
-            pg.K_DOWN: (x, y-1),
-            pg.K_RIGHT: (x-1, y),
-            pg.K_LEFT: (x+1, y)
-        }
-
-        move_map = {
-            pg.K_UP: 'U',
-            pg.K_DOWN: 'D',
-            pg.K_RIGHT: 'R',
-            pg.K_LEFT: 'L',
-        }
-
-        letter_convert = {
-            'U': pg.K_UP,
-            'D': pg.K_DOWN,
-            'R': pg.K_RIGHT,
-            'L': pg.K_LEFT
-        }
+        index = self.empty_index
 
         # Convert letter moves to pygame inputs
-        if move in {'U', 'D', 'L', 'R'}:
-            move = letter_convert[move]
+        if move in LETTER_MOVES:
+            move = LETTER_MOVES[move]
     
-        # Swap with the neighbor
-        if move in neighbors:
-            nx, ny = neighbors[move]
-            
-            if self.is_index_in_bounds(nx, ny):
-                self.grid[y][x], self.grid[ny][nx] = self.grid[ny][nx], self.grid[y][x]
-                self.empty_index = [nx, ny]
-
-                # So that shuffling doesn't increase move count
-                if not shuffle:
-                    self.moves_made += move_map[move]
+        # Swap with the neighboring block from the empty space in the opposite direction
+        neighbor = self.neighbors[index].get(move)
+        if neighbor is not None:
+            # Only the tile sliding into the empty space and the empty space itself move,
+            # so the count changes by whether each was in its solved place before and after the swap
+            value = int(self.board[neighbor])
+            solved = self.solved_values
+            self.misplaced += (value != solved[index]) + (solved[neighbor] != 0) - (value != solved[neighbor]) - (solved[index] != 0)
+            self.board[index] = value
+            self.board[neighbor] = 0
+            self.empty_index = neighbor
+            self.dirty_tiles += [index, neighbor]
+            self.dirty_rects += [self.screen_tile_rects[index], self.screen_tile_rects[neighbor]]
+
+            self.moves_made.append(MOVE_CODES[move])
+
+            # Determine which sound to play
+            won = self.has_won and self.has_started
+            if won:
+                self.play_sfx('win')
+                self.save_state()
+            else:
+                self.play_sfx('move')
+            return won
 
-                # Determine which sound to play
-                if self.has_won and self.has_started:
-                    self.play_sfx('win')
-                    self.save_state()
-                elif not shuffle:
-                    self.play_sfx('move')
+        return False
 
     def save_state(self):
-        self.previous_state['moves_made'] = self.moves_made
-        self.previous_state['scrambled_board'] = self.get_tile_values(self.scrambled_board)
-        save_current_state(self.previous_state)
+        state = {
+            'moves_made': self.moves_made.decode('ascii'),
+            'scrambled_board': self.scrambled_board.reshape(self.height, self.width).tolist()
+        }
+
+        # Finishing a replay wins with the same moves again, which doesn't need to be written to disk
+        if state != self.previous_state:
+            self.previous_state = state
+            save_current_state(state)
 
     def reverse_solve(self, solve):
-        """Function which performs the inverse of the solved moves in order to tget the original scrambled state."""
+        """
+        Function which performs the inverse of the solved moves in order to get the original scrambled state.
+        Like shuffling, the empty space is walked around a plain list copy of the board instead of going through make_move.
+        """
 
-        inverse = {
-            'U': pg.K_DOWN,
-            'D': pg.K_UP,
-            'L': pg.K_RIGHT,
-            'R': pg.K_LEFT
-        }
+        values = self.board.tolist()
+        y, x = divmod(self.empty_index, self.width)
 
-        res = ''
-        for move in reversed(solve):
-            self.make_move(inverse[move], shuffle=True)
+        for letter in reversed(solve):
+            # Undoing a move sends the empty space back the opposite way
+            dx, dy = MOVE_DELTAS[LETTER_MOVES[letter]]
+            nx, ny = x-dx, y-dy
+            if self.is_index_in_bounds(nx, ny):
+                index, neighbor = y*self.width + x, ny*self.width + nx
+                values[index], values[neighbor] = values[neighbor], values[index]
+                x, y = nx, ny
+
+        self.board[:] = values
+        self.board_changed(y*self.width + x)
             
     def shuffle(self):
-        """Will make 1000 random moves."""
+        """Will make 10000 random moves, without recording them, playing sounds or checking for a win."""
+
+        # Every direction is picked up front in one call, rather than once per step of the walk
+        directions = np.random.randint(0, len(WALK_DELTAS), 10000, dtype=np.int8)
+        index = walk_empty_space(self.board, self.width, self.empty_index, directions)
+        self.board_changed(index)
 
-        for _ in range(10000):
-            move = random.choice([pg.K_UP, pg.K_DOWN, pg.K_LEFT, pg.K_RIGHT])
-            self.make_move(move, shuffle=True)
+    def board_changed(self, empty_index):
+        """Called after tiles were moved around the board without make_move, to recount how many are out of place and redraw it."""
+
+        self.empty_index = empty_index
+        self.misplaced = int(np.count_nonzero(self.board != self.solved))
+        self.redraw_board()
+
+    def set_grid_color(self, color):
+        """
+        Changes the colour around and behind the tiles, the whole grid is redrawn and updated on the window only if the colour is different.
+        The colour is given as a pg.Color or tuple, so it can be compared as it is and only copied into a new pg.Color when it changes.
+        """
+
+        if color != self.grid_color:
+            self.grid_color = pg.Color(color)
+            self.dirty = True
+            self.dirty_rects.append(self.area_rect)
+
+    def redraw_board(self):
+        """Marks the whole board to be drawn again and updated on the window."""
+
+        self.dirty = True
+        self.dirty_rects.append(self.board_rect)
 
     def display(self):
-        x, y = 0, 0
-        screen.fill(self.grid_color)
+        """Draws the parts of the grid which changed since it was last displayed onto the screen, the rest is left as it was."""
+
+        if self.dirty:
+            self.rebuild_board_surface()
+            for rect in self.margin_rects:
+                screen.fill(self.grid_color, rect)
+            screen.blit(self.board_surface, self.board_rect)
+            self.dirty = False
+        else:
+            for index in self.dirty_tiles:
+                self.render_tile(index, self.board[index])
+                screen.blit(self.board_surface, self.screen_tile_rects[index], self.tile_rects[index])
+        self.dirty_tiles.clear()
 
-        for y in range(self.height):
-            for x in range(self.width):
-                x_pos = (x * self.tile_length) + self.margin_x
-                y_pos = (y * self.tile_length) + self.margin_y
-                tile = self.grid[y][x]
-                border_rect = pg.Rect(x_pos, y_pos, self.tile_length, self.tile_length)
+    def rebuild_board_surface(self):
+        """Redraws every tile onto the cached board surface."""
 
-                # If displaying chunks of an image
-                if tile.img is not None:
-                    screen.blit(tile.img, (x_pos, y_pos))
+        for index, value in enumerate(self.board.tolist()):
+            self.render_tile(index, value)
 
-                if self.config['enable_tile_borders'] and tile.value != '':
+    def render_tile(self, index, value):
+        """Draws the tile with the given value at an index of the board onto the cached board surface. Positions are relative to the board, not the screen."""
 
-                    if self.config['rounded_corners']:
-                        pg.draw.rect(screen, self.line_color, border_rect, 1, border_radius=20)
-                    else:
-                        pg.draw.rect(screen, self.line_color, border_rect, 1)
+        border_rect = self.tile_rects[index]
+        self.board_surface.fill(self.grid_color, border_rect)
 
-                if self.config['enable_tile_numbers']:
-                    text = self.font.render(tile.value, False, self.line_color)
-                    text_rect = text.get_rect()
-                    text_rect.center = border_rect.center
-                    screen.blit(text, text_rect)
-                
+        # If displaying chunks of an image
+        img = self.tile_imgs[value]
+        if img is not None:
+            self.board_surface.blit(img, border_rect)
 
-class Tile:
-    def __init__(self, value, img=None):
-        self.value = value
-        self.img = img
+        if self.config['enable_tile_borders'] and value != 0:
 
-    def __repr__(self):
-        return f"Tile({self.value})"
+            if self.config['rounded_corners']:
+                pg.draw.rect(self.board_surface, self.line_color, border_rect, 1, border_radius=20)
+            else:
+                pg.draw.rect(self.board_surface, self.line_color, border_rect, 1)
+
+        if self.config['enable_tile_numbers']:
+            text = self.number_surfaces[value]
+            if text is not None:
+                offset_x, offset_y = self.number_offsets[value]
+                center_x, center_y = self.tile_centers[index]
+                self.board_surface.blit(text, (center_x - offset_x, center_y - offset_y))
+                
 
 class SideBar:
     def __init__(self, real_width, real_height, grid, theme):
@@ -405,43 +668,75 @@ class SideBar:
         self.grid = grid
         self.tile_length = self.grid.tile_length
 
-        # Setting themes
-        self.sidebar_color = theme['sidebar_color']
-        self.secondary_color = theme['line_color']
+        # Setting themes, the colours are parsed once here rather than every time text is rendered
+        self.sidebar_color = pg.Color(theme['sidebar_color'])
+        self.secondary_color = pg.Color(theme['line_color'])
         self.font_name = theme['font_name']
 
+        # Loading a system font is slow, so each size is only loaded once
+        self.fonts = {size: pg.font.SysFont(self.font_name, size) for size in (15, 30)}
+
+        # The time and moves are centred around these, with their label above and their value below
+        self.time_axis = (self.height // 2) - 50
+        self.moves_axis = (self.height // 2) + 50
+        self.label_margin_y = 15
+
         # Positions the sidebar on the right of the main grid
         self.sidebar_surface = pg.Surface((self.width, self.height))
         self.top_left = (self.grid.width * self.tile_length) + (self.grid.margin_x*2)
+        self.static_surface = self.draw_static()
 
         self.timer = 0
 
-    def display(self, dt):
-        screen.blit(self.sidebar_surface, (self.top_left, 0))
-        self.sidebar_surface.fill(pg.Color(self.sidebar_color))
+        # The text last drawn on each value row, so a row is only re-rendered when its text changes
+        self.shown_values = {}
+        self.shown_timer = None # The time is only formatted again once it has changed, it stays the same while paused
+
+        # Only the time and moves change after the sidebar is first shown, so only they need updating on the window
+        self.dirty_rects = [pg.Rect(self.top_left, 0, self.width, self.height)]
+
+    def draw_static(self):
+        """Draws the parts of the sidebar which never change, returning a copy of them to start each frame from."""
+
+        self.sidebar_surface.fill(self.sidebar_color)
 
         # Border dividing the grid and the sidebar
-        pg.draw.line(self.sidebar_surface, pg.Color(self.secondary_color), (0, 0), (0, self.height), width=5)
+        pg.draw.line(self.sidebar_surface, self.secondary_color, (0, 0), (0, self.height), width=5)
+
+        self.display_text("Time:", self.time_axis - self.label_margin_y)
+        self.display_text("Moves Made:", self.moves_axis - self.label_margin_y)
+        self.display_tips()
+        return self.sidebar_surface.copy()
 
+    def display(self, dt):
         # Display info
         self.display_time()
-        self.display_tips()
         self.display_moves()
         self.timer_tick(dt)
 
+        # Only the areas of the sidebar which changed are copied onto the screen
+        for rect in self.dirty_rects:
+            screen.blit(self.sidebar_surface, rect, rect.move(-self.top_left, 0))
+
     def display_time(self):
-        center = self.height // 2
-        axis = center - 50
-        margin_y = 15
-        self.display_text("Time:", axis - margin_y)
-        self.display_text(self.format_milliseconds(self.timer), axis + margin_y)
+        if self.timer != self.shown_timer:
+            self.shown_timer = self.timer
+            self.display_value(self.format_milliseconds(self.timer), self.time_axis + self.label_margin_y)
 
     def display_moves(self):
-        center = self.height // 2
-        axis = center + 50
-        margin_y = 15
-        self.display_text("Moves Made:", axis - margin_y)
-        self.display_text(str(len(self.grid.moves_made)), axis + margin_y)
+        self.display_value(str(len(self.grid.moves_made)), self.moves_axis + self.label_margin_y)
+
+    def display_value(self, txt, y_pos):
+        """Displays text which changes between frames, after clearing its row back to the static sidebar underneath."""
+
+        if self.shown_values.get(y_pos) == txt:
+            return
+        self.shown_values[y_pos] = txt
+
+        height = self.fonts[30].get_height()
+        row = pg.Rect(0, y_pos - (height // 2), self.width, height)
+        self.sidebar_surface.blit(self.static_surface, row, row)
+        self.dirty_rects.append(self.display_text(txt, y_pos))
 
     def display_tips(self):
         axis = self.height - (self.height // 5) 
@@ -451,14 +746,16 @@ class SideBar:
         """
         This will display text at a given y position in the sidebar and will center it to look nice.
         By default, it will take in a tile_y_pos so it looks nice and aligned with the grid.
+        Returns the area of the screen covered by the row of text, across the whole width of the sidebar.
         """
 
-        font = pg.font.SysFont(self.font_name, size)
-        width, height = font.size(txt)
+        # The rendered text is already the size of the string, so the font isn't asked to measure it separately
+        text = self.fonts[size].render(txt, False, self.secondary_color)
+        width, height = text.get_size()
         x_pos = (self.width//2) - (width//2)
         y_pos = y_pos - (height // 2)
-        text = font.render(txt, False, self.secondary_color)
         self.sidebar_surface.blit(text, (x_pos, y_pos))
+        return pg.Rect(self.top_left, y_pos, self.width, height)
 
     def format_milliseconds(self, milliseconds):
         seconds, milliseconds = divmod(milliseconds, 1000)
@@ -485,6 +782,11 @@ def main():
     margin_x = 20
     margin_y = 20
 
+    # Only the modules used by every theme are started here, the mixer is left to themes with sound
+    pg.display.init()
+    pg.font.init()
+    pg.display.set_caption("Sliding Puzzle")
+
     global screen
     screen_width = (width * tile_length) + (sidebar_width) + (2*margin_x)
     screen_height = (height * tile_length) + (2*margin_y)